@@ -0,0 +1,217 @@
+# benchmark.py - Replay benchmark for the question generator, using a local fake LLM
+#
+# Example:
+#   python benchmark.py --latency 0.3 --tokens-per-second 80 --users 1,4,16
+#
+# The Gemini client is swapped for FakeChatModel, which answers deterministically
+# after a configurable delay and token rate, so no API key or network is needed.
+# A separate in-memory cache is used, so the app's real cache file is never touched.
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import generator
+from generator import SKILLS_DATABASE, request_key, stream_sat_question
+from job_scheduler import JobScheduler
+from metrics import RequestMetrics
+from question_cache import QuestionCache, set_question_cache
+
+SAMPLE_PASSAGE = (
+    "Astronomers investigated the Arabia Terra region of Mars because it appears to contain "
+    "irregularly shaped craters that may have been caused by massive volcanic explosions. "
+    "In their investigations, the researchers found remnants of ash deposits in an amount and "
+    "thickness that would result from a massive volcanic eruption. However, erosion and past "
+    "resurfacing events could have modified the surface of the planet."
+)
+
+
+# --- 1. THE FAKE CHAT MODEL ---
+
+class FakeChatModel(BaseChatModel):
+    """
+    A deterministic stand-in for the Gemini chat model. It waits `latency`
+    seconds, then produces `tokens_per_second` words per second. The same
+    prompt always gets the same reply.
+    """
+
+    latency: float = 0.5
+    tokens_per_second: float = 50.0
+    reply_tokens: int = 120
+
+    @property
+    def _llm_type(self):
+        return "fake-sat-benchmark"
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        words = [f"word{(seed + i) % 997}" for i in range(self.reply_tokens)]
+        if "Reply with ONLY the rewritten text" in prompt:
+            return " ".join(words) + "."
+        third = self.reply_tokens // 3
+        return (
+            f"Question:\n{' '.join(words[:third])}?\n\n"
+            "Choices:\n(A) one\n(B) two\n(C) three\n(D) four\n\n"
+            f"Feedback:\n**Correct Answer:** ({'ABCD'[seed % 4]})\n{' '.join(words[third:])}."
+        )
+
+    def _usage(self, messages, reply):
+        input_tokens = sum(len(message.content.split()) for message in messages)
+        output_tokens = len(reply.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self._reply(messages)
+        time.sleep(self.latency + len(reply.split()) / self.tokens_per_second)
+        message = AIMessage(content=reply, usage_metadata=self._usage(messages, reply))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self._reply(messages)
+        time.sleep(self.latency)
+        for word in reply.split(" "):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        # Usage data arrives with the last chunk, as streaming chat models usually report it
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+
+# --- 2. STATISTICS ---
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(name, latencies, first_tokens, wall_time, tokens):
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall_time if wall_time else None,
+        "tokens_per_second": tokens / wall_time if wall_time else None,
+        **{f"p{p}": percentile(latencies, p) for p in (50, 95, 99)},
+        **{f"ttft_p{p}": percentile(first_tokens, p) for p in (50, 95, 99)},
+    }
+
+
+# --- 3. SCENARIOS ---
+
+def run_sweep(subtests, force_fresh):
+    """
+    Generates one question per subtest x domain x band, one after another,
+    the way a single teacher would click through them.
+    """
+    latencies, first_tokens, tokens = [], [], 0
+    start = time.perf_counter()
+    for subtest in subtests:
+        for domain in SKILLS_DATABASE[subtest]:
+            for band in SKILLS_DATABASE[subtest][domain]:
+                metrics = RequestMetrics()
+                for _ in stream_sat_question(SAMPLE_PASSAGE, subtest, domain, band,
+                                             force_fresh=force_fresh, metrics=metrics):
+                    pass
+                latencies.append(metrics.total)
+                first_tokens.append(metrics.time_to_first_token)
+                tokens += metrics.completion_tokens
+    return summarize("sweep", latencies, first_tokens, time.perf_counter() - start, tokens)
+
+
+def run_concurrent(users, requests_per_user, workers, subtest):
+    """
+    Has `users` sessions each submit `requests_per_user` different requests
+    at once through a JobScheduler, like a class using the app together.
+    """
+    scheduler = JobScheduler(max_workers=workers, max_queue=users * requests_per_user)
+    targets = [(domain, band) for domain in SKILLS_DATABASE[subtest] for band in SKILLS_DATABASE[subtest][domain]]
+    submitted = []
+    start = time.perf_counter()
+    for user in range(users):
+        for index in range(requests_per_user):
+            domain, band = targets[(user * requests_per_user + index) % len(targets)]
+            # A different passage per request, so every request reaches the model
+            passage = f"{SAMPLE_PASSAGE} (Session {user}, request {index}.)"
+            metrics = RequestMetrics()
+            job = scheduler.submit(
+                request_key(passage, subtest, domain, band), f"user-{user}",
+                stream_sat_question, passage, subtest, domain, band, metrics=metrics,
+            )
+            submitted.append((job, metrics))
+    for job, _ in submitted:
+        job.wait()
+    wall_time = time.perf_counter() - start
+
+    failed = [job for job, _ in submitted if job.status != "done"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} benchmark jobs failed, e.g. {failed[0].error!r}")
+    return summarize(
+        f"{users} users x {requests_per_user} requests ({workers} workers)",
+        [metrics.total for _, metrics in submitted],
+        [metrics.time_to_first_token for _, metrics in submitted],
+        wall_time,
+        sum(metrics.completion_tokens for _, metrics in submitted),
+    )
+
+
+def print_results(results):
+    def seconds(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    print(f"{'scenario':<40} {'reqs':>5} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'ttft50':>7} {'ttft95':>7}")
+    for result in results:
+        print(f"{result['scenario']:<40} {result['requests']:>5} {result['throughput_rps']:>7.2f} "
+              f"{seconds(result['p50']):>7} {seconds(result['p95']):>7} {seconds(result['p99']):>7} "
+              f"{seconds(result['ttft_p50']):>7} {seconds(result['ttft_p95']):>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the question generator against a local fake LLM.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the fake model's first token (default 0.5).")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake model output speed (default 50).")
+    parser.add_argument("--reply-tokens", type=int, default=120, help="Words per fake reply (default 120).")
+    parser.add_argument("--subtest", action="append", dest="subtests",
+                        help="Subtest to sweep (repeatable). Defaults to every subtest.")
+    parser.add_argument("--users", default="1,4,16", help="Comma-separated concurrent user counts (default 1,4,16).")
+    parser.add_argument("--requests-per-user", type=int, default=3, help="Requests each user submits (default 3).")
+    parser.add_argument("--workers", type=int, default=4, help="Scheduler worker threads (default 4).")
+    parser.add_argument("--cached", action="store_true", help="Let the sweep reuse cached stages instead of forcing fresh calls.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    subtests = args.subtests or list(SKILLS_DATABASE)
+    for subtest in subtests:
+        if subtest not in SKILLS_DATABASE:
+            parser.error(f"Unknown subtest: {subtest}")
+
+    generator.set_llm(FakeChatModel(
+        latency=args.latency, tokens_per_second=args.tokens_per_second, reply_tokens=args.reply_tokens,
+    ))
+    set_question_cache(QuestionCache(db_path=":memory:"))
+
+    results = [run_sweep(subtests, force_fresh=not args.cached)]
+    for users in (int(value) for value in args.users.split(",") if value.strip()):
+        results.append(run_concurrent(users, args.requests_per_user, args.workers, subtests[0]))
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
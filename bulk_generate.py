@@ -0,0 +1,280 @@
+# bulk_generate.py - Fill the question banks from the command line
+#
+# Example:
+#   python bulk_generate.py passages/ --subtest "Reading And Writing" --concurrency 8 --rate 2
+#
+# Every passage is run against every selected domain and score band with the
+# same prompt as the web app. The Gemini key is read from the GOOGLE_API_KEY
+# environment variable. Finished jobs are recorded in a progress file,
+# so an interrupted run can simply be started again and picks up where it stopped.
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+from generator import SKILLS_DATABASE, agenerate_sat_question
+from question_bank import BANK_DIR, BANK_FILES, append_to_bank, split_sections
+
+DEFAULT_PROGRESS_FILE = ".bulk_progress.jsonl"
+
+
+# --- 1. LOADING PASSAGES AND JOBS ---
+
+def load_passages(source):
+    """
+    Loads source passages from a directory of .txt files or from a JSONL file
+    where each line looks like {"id": "...", "text": "..."}.
+    Returns a list of (passage_id, text) pairs.
+    """
+    passages = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".txt"):
+                with open(os.path.join(source, name), encoding="utf-8") as passage_file:
+                    text = passage_file.read().strip()
+                if text:
+                    passages.append((name, text))
+    else:
+        with open(source, encoding="utf-8") as jsonl_file:
+            for line_number, line in enumerate(jsonl_file, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                passage_id = str(record.get("id", f"line-{line_number}"))
+                text = record["text"].strip()
+                if text:
+                    passages.append((passage_id, text))
+    return passages
+
+
+def build_jobs(passages, subtests, domains, bands):
+    """
+    Builds one job per passage x domain x score band.
+    Raises ValueError for a subtest or domain that is not in SKILLS_DATABASE.
+    """
+    for subtest in subtests:
+        if subtest not in SKILLS_DATABASE:
+            raise ValueError(f"Unknown subtest: {subtest}")
+    for domain in domains or []:
+        if not any(domain in SKILLS_DATABASE[subtest] for subtest in subtests):
+            raise ValueError(f"Unknown domain: {domain}")
+
+    jobs = []
+    for subtest in subtests:
+        if domains:
+            subtest_domains = [domain for domain in domains if domain in SKILLS_DATABASE[subtest]]
+        else:
+            subtest_domains = list(SKILLS_DATABASE[subtest])
+        for domain in subtest_domains:
+            if domain not in BANK_FILES:
+                raise ValueError(f"No bank file for domain: {domain}")
+            for passage_id, text in passages:
+                for band in bands:
+                    job_id = hashlib.sha256(
+                        f"{passage_id}\x00{text}\x00{subtest}\x00{domain}\x00{band}".encode("utf-8")
+                    ).hexdigest()[:16]
+                    jobs.append({
+                        "id": job_id,
+                        "passage_id": passage_id,
+                        "text": text,
+                        "subtest": subtest,
+                        "domain": domain,
+                        "score_band": band,
+                    })
+    return jobs
+
+
+def parse_bands(value):
+    """
+    Parses a band list such as "1-7" or "2,4,6" into a list of ints.
+    """
+    bands = []
+    for part in value.split(","):
+        part = part.strip()
+        if "-" in part:
+            low, high = part.split("-", 1)
+            bands.extend(range(int(low), int(high) + 1))
+        elif part:
+            bands.append(int(part))
+    for band in bands:
+        if band not in range(1, 8):
+            raise argparse.ArgumentTypeError(f"Score bands run from 1 to 7, got {band}")
+    return bands
+
+
+# --- 2. RESUMABLE PROGRESS ---
+
+def load_progress(progress_path):
+    """
+    Returns the set of job ids already finished in an earlier run.
+    """
+    done = set()
+    if os.path.exists(progress_path):
+        with open(progress_path, encoding="utf-8") as progress_file:
+            for line in progress_file:
+                if line.strip():
+                    done.add(json.loads(line)["id"])
+    return done
+
+
+def record_progress(progress_path, job):
+    """
+    Marks a job as finished. This happens right after its item is appended to the
+    bank, so a run killed between the two writes appends that item again on resume.
+    """
+    with open(progress_path, "a", encoding="utf-8") as progress_file:
+        progress_file.write(json.dumps({
+            "id": job["id"],
+            "passage_id": job["passage_id"],
+            "domain": job["domain"],
+            "score_band": job["score_band"],
+            "finished_at": time.time(),
+        }) + "\n")
+
+
+# --- 3. RATE LIMITING AND RETRIES ---
+
+class TokenBucket:
+    """
+    A simple token bucket: allows `rate` requests per second on average,
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def make_limiter(semaphore, bucket):
+    """
+    Returns the limiter passed to agenerate_sat_question: every LLM call
+    (two per question) holds a concurrency slot and takes a rate-limit token.
+    """
+    @contextlib.asynccontextmanager
+    async def limiter():
+        async with semaphore:
+            await bucket.acquire()
+            yield
+
+    return limiter
+
+
+async def generate_with_retry(job, limiter, retries, base_delay, force_fresh):
+    """
+    Runs one job, retrying failed LLM calls with exponential backoff and jitter.
+    Unless force_fresh is set, a stage that already finished is cached, so a retry
+    only redoes the failed one.
+    A reply without a Question or Choices section counts as a failure too, and its
+    retry writes a new question instead of reusing the cached one.
+    """
+    fresh_question = False
+    for attempt in range(retries + 1):
+        try:
+            response = await agenerate_sat_question(
+                job["text"], job["subtest"], job["domain"], job["score_band"],
+                force_fresh=force_fresh, fresh_question=fresh_question, limiter=limiter,
+            )
+            sections = split_sections(response)
+            if not sections.get("Question") or not sections.get("Choices"):
+                fresh_question = True
+                raise ValueError("the reply has no Question or Choices section")
+            return response
+        except Exception as error:
+            if attempt == retries:
+                raise
+            delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+            print(f"  retrying {job['passage_id']} / {job['domain']} / band {job['score_band']} "
+                  f"in {delay:.1f}s ({error})", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+
+# --- 4. RUNNING THE JOBS ---
+
+async def run_jobs(jobs, args):
+    """
+    Runs all jobs with at most args.concurrency LLM calls in flight,
+    appending each result to its bank file as soon as it finishes.
+    """
+    limiter = make_limiter(asyncio.Semaphore(args.concurrency), TokenBucket(args.rate, max(1, args.burst)))
+    finished = 0
+    failed = 0
+
+    async def run_one(job):
+        nonlocal finished, failed
+        try:
+            response = await generate_with_retry(job, limiter, args.retries, args.backoff, args.force_fresh)
+        except Exception as error:
+            failed += 1
+            print(f"FAILED {job['passage_id']} / {job['domain']} / band {job['score_band']}: {error}",
+                  file=sys.stderr)
+            return
+        append_to_bank(job["domain"], response, job["score_band"], bank_dir=args.bank_dir)
+        record_progress(args.progress, job)
+        finished += 1
+        print(f"[{finished}/{len(jobs)}] {job['passage_id']} / {job['domain']} / band {job['score_band']}")
+
+    await asyncio.gather(*(run_one(job) for job in jobs))
+    return finished, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate SAT questions in bulk and append them to the question banks.")
+    parser.add_argument("passages", help="A directory of .txt passages or a JSONL file of {\"id\", \"text\"} records.")
+    parser.add_argument("--subtest", action="append", dest="subtests",
+                        help="Subtest to generate for (repeatable). Defaults to every subtest.")
+    parser.add_argument("--domain", action="append", dest="domains",
+                        help="Domain to generate for (repeatable). Defaults to every domain of the subtest.")
+    parser.add_argument("--bands", type=parse_bands, default=list(range(1, 8)),
+                        help="Score bands, e.g. \"1-7\" or \"2,4,6\". Defaults to all seven.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM calls in flight (default 4).")
+    parser.add_argument("--rate", type=float, default=1.0, help="Average LLM calls started per second (default 1).")
+    parser.add_argument("--burst", type=int, default=4, help="Calls allowed to start at once before rate limiting (default 4).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per job after a failed call (default 3).")
+    parser.add_argument("--backoff", type=float, default=2.0, help="First retry delay in seconds, doubled each time (default 2).")
+    parser.add_argument("--progress", default=DEFAULT_PROGRESS_FILE, help="Progress file used to resume a run.")
+    parser.add_argument("--bank-dir", default=BANK_DIR, help="Folder that holds the bank .txt files.")
+    parser.add_argument("--force-fresh", action="store_true", help="Ignore cached responses.")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.rate <= 0:
+        parser.error("--concurrency must be at least 1 and --rate must be positive")
+
+    try:
+        passages = load_passages(args.passages)
+        jobs = build_jobs(passages, args.subtests or list(SKILLS_DATABASE), args.domains, args.bands)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+
+    done = load_progress(args.progress)
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(passages)} passages, {len(jobs)} jobs, {len(jobs) - len(pending)} already done.")
+    if not pending:
+        return 0
+
+    finished, failed = asyncio.run(run_jobs(pending, args))
+    print(f"Finished {finished} jobs, {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
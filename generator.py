@@ -0,0 +1,414 @@
+# generator.py - The AI question generator used by app.py
+
+import asyncio
+import threading
+
+from metrics import RequestMetrics
+from passage_condenser import condense_passage
+from question_cache import get_question_cache, make_cache_key, normalize_passage
+
+# --- 1. SKILLS INSIGHT DATABASE ---
+# (Your complete SKILLS_DATABASE dictionary goes here - I've trimmed it for brevity)
+SKILLS_DATABASE = {
+    "Reading And Writing": {
+        "Information And Ideas": {
+            1: "Students in this performance score band are beginning to obtain foundational skills to be college ready.",
+            2: "Determine the most effective literary quotation to illustrate a straightforward claim about a character, setting, or theme; Locate relevant data points in informational graphics associated with passages at the middle grades level.",
+            3: "Determine the most effective textual evidence (e.g., an additional finding; a quotation from a scholar) to support a claim in passages at the middle grades level as well as some at the high school level; Accurately identify explicitly stated and implicitly conveyed details in passages at the high school level.",
+            4: "Determine the main idea of passages at the high school level; Make basic comparisons (e.g., determine highest/lowest value) among relevant data in informational graphics associated with passages at the middle grades level.",
+            5: "Draw a reasonable text-based inference from passages at the middle grades level as well as some at the high school level; Make comparisons among relevant data in informational graphics associated with passages at the high school level in order to complete an example or illustrate or support a straightforward claim.",
+            6: "Draw a reasonable text-based inference from passages at the high school level as well as some at the early college level; Determine the most effective literary quotation to support or illustrate an analytical claim about passages at the early college level; Interpret and integrate relevant data from informational graphics associated with passages at the high school level in order to support a claim.",
+            7: "Draw a reasonable text-based inference from passages at the early college level; Determine the most effective textual evidence (e.g., a finding of a research study) to support or refute a claim in passages at the early college level; Interpret and integrate relevant data from informational graphics associated with passages at the early college level in order to support or refute a claim."
+        },
+        "Craft And Structure": {
+            1: "Students in this performance score band are beginning to obtain foundational skills to be college ready.",
+            2: "Determine the most logical and precise high-utility academic word or phrase to use in simple contexts and when the focal words and phrases are encountered frequently in texts at the middle grades level; Describe the function of a portion (e.g., a phrase or sentence) of a passage at the middle grades level in the context of the passage as a whole.",
+            3: "Determine the most logical and precise high-utility academic word or phrase to use in moderately simple contexts and when the focal words and phrases are encountered frequently in texts at the middle grades level; Determine the meaning of a high-utility academic word or phrase in literary passages at the middle grades level; Describe the main purpose of passages at the middle grades level.",
+            4: "Determine the most logical and precise high-utility academic word or phrase to use in moderately complex contexts and when the focal words and phrases are encountered frequently in texts at the high school level; Determine the meaning of a high-utility academic word or phrase, including the literal sense of a figurative word or phrase, in literary passages at the high school level; Describe the function of a portion (e.g., a phrase or sentence) of a passage at the high school level in the context of the passage as a whole.",
+            5: "Determine the most logical and precise high-utility academic word or phrase to use in complex contexts and when the focal words and phrases are encountered frequently in texts at the high school level; Describe the main purpose of passages at the high school level when the authors’ goals are unstated; Draw a text-supported connection between two passages at the middle grades level on the same or similar topics.",
+            6: "Determine the most logical and precise high-utility academic word or phrase to use in complex contexts and when the focal words and phrases are encountered frequently in texts at the early college level; Draw a text-supported connection between two passages at the high school level on the same or similar topics; Describe the function of a portion (e.g., a phrase or sentence) of a passage at the early college level in the context of the passage as a whole.",
+            7: "Determine the most logical and precise high-utility academic word or phrase to use in highly complex contexts and when the focal words and phrases are encountered frequently in texts at the early college level; Draw a subtle text-supported connection between two passages at the early college level on the same or similar topics."
+        },
+        "Expression Of Ideas": {
+            1: "Students in this performance score band are beginning to obtain foundational skills to be college ready.",
+            2: "Determine the most effective transition word or phrase to introduce a supporting example (e.g., for instance); Determine the most effective transition word or phrase to indicate a logical relationship of time or sequence (e.g., later or next).",
+            3: "Determine the most effective transition word or phrase to establish a logical relationship between two directly contrasting statements (e.g., however); Synthesize information from several statements to emphasize a similarity or difference.",
+            4: "Determine the most effective transition word or phrase to indicate a cause-effect relationship between two statements (e.g., therefore); Synthesize information from several statements to emphasize a single feature or explain a concept.",
+            5: "Determine the most effective transition word or phrase to signal a shift from a general discussion to a more specific case or example (e.g., specifically) or introduce a restatement of information (e.g., in short); Synthesize information from several complex statements to provide an explanation or form a comparison.",
+            6: "Determine the most effective transition word or phrase to emphasize a point within a discussion (e.g., in fact); Synthesize information from several complex statements to provide a concise summary.",
+            7: "Determine the most effective transition word or phrase to indicate an exception or counterpoint (e.g., granted); Synthesize information from several complex statements to make a rhetorically effective generalization."
+        },
+        "Standard English Conventions": {
+            1: "Students in this performance score band are beginning to obtain foundational skills to be college ready.",
+            2: "Maintain grammatical agreement between a subject and verb positioned closely together within a sentence; Determine correct verb formation in a fairly straightforward sentence.",
+            3: "Maintain consistent verb tense in a sentence using two or more verbs in simple past or present tense; Determine when the possessive and/or plural form of a singular noun is required by the sense of a sentence; Maintain grammatical agreement between a subject pronoun and its singular referent.",
+            4: "Use a comma to mark a boundary between a main clause and a supplementary phrase within a sentence; Use a period to punctuate the end of a declarative sentence, thereby avoiding creating a comma splice or run-on sentence; Maintain grammatical agreement between a noun and its pronoun in a straightforward sentence in which the pronoun precedes the referent.",
+            5: "Use a semicolon to mark the boundary between two closely related independent clauses when the clauses are joined by a conjunctive adverb (e.g., however); Use commas to set off an interrupting nonessential sentence element.",
+            6: "Eliminate unnecessary punctuation in challenging situations (e.g., between a long subject and the predicate or between two coordinate elements in a sentence); Use a colon to introduce an elaboration (e.g., a list of examples; a noun phrase renaming a previously mentioned concept); Use a period or semicolon to mark the boundary between two sentences when the boundary is subtle or requires careful reading to establish.",
+            7: "Maintain grammatical agreement between a subject and verb in relatively complex sentences in which a substantial amount of text appears between the subject and main verb; Properly incorporate a restrictive sentence element, such as an appositive phrase modifying a noun phrase; Use a colon to introduce an independent clause elaborating on a statement or claim."
+        }
+    },
+    "Math": {
+        "Algebra": {
+            1: "With or without a simple context, solve a one-step linear equation in one variable.",
+            2: "Solve problems using a graph or linear equation when given one or more pieces of the following information: slope, intercepts, input-output pairs; Identify the coordinates of a solution, point, or intercept when given a graph of a linear equation or a graph of a system of two linear equations.",
+            3: "With or without a simple context, create a linear equation in one variable or a system of two linear equations in two variables, and use the equation(s) to solve for an unknown value; Within a context, interpret the meaning of an input-output pair of a linear function.",
+            4: "Within a complex context, choose the best interpretation of a part of an equation or of an input-output pair when given a linear equation that models the situation; Solve problems about linear relationships, making use of structure when present, that include equations, intercepts, slope, and input-output pairs, including finding equations for parallel and perpendicular lines.",
+            5: "With or without a context, create a linear inequality in two variables or a system of two linear inequalities in two variables, and identify a point in the solution set; Within a context, create a linear function, and use it to find an unknown value; Make connections between an algebraic representation of a linear relationship and a graph or key features of the graph.",
+            6: "Find and interpret the meaning of intercepts or slope for complex linear equations; Find the number of solutions to a complex linear equation; (SAT, PSAT/NMSQT, and PSAT 10 only) find the number of solutions to a system of two linear equations, or find missing coefficients of a linear equation or a system of two linear equations when the number of solutions is given; Make connections between a table, an algebraic representation, a graph, a solution, or features of a graph of a complex linear equation or a system of two linear equations.",
+            7: "With or without a context, create and/or solve a linear equation or system of linear equations, or identify the correct coefficients or constants in the equation(s) that represent(s) the situation; Make connections between different representations of linear equations in one variable, linear functions, linear equations in two variables, systems of two linear equations in two variables, and (SAT, PSAT/NMSQT, and PSAT 10 only) linear inequalities when these representations include symbolic representations that may contain variable constants."
+        },
+        "Advanced Math": {
+            1: "Students in this performance score band are beginning to obtain foundational skills to be college ready.",
+            2: "Identify a key feature of a graph, such as an intercept, a solution, or (SAT, PSAT/NMSQT, and PSAT 10 only) a translation, when given the graph of either a nonlinear function or a system consisting of a linear and a nonlinear function; Rewrite an expression by combining like terms, factoring out a greatest common factor, or applying the distributive property.",
+            3: "With or without a context, use a given quadratic or exponential equation that represents the relationship between two variables to find an unknown value; Evaluate a function at a given value, or solve for the input when the output is given; (PSAT 8/9 only) solve polynomial equations by factoring out a greatest common factor.",
+            4: "With or without a context, use a quadratic or exponential equation that represents the relationship between two variables, or (SAT, PSAT/NMSQT, and PSAT 10 only) create and use a quadratic or exponential equation that represents the relationship between two variables; Solve quadratic equations using factoring; solve equations that include radical or rational terms, or solve a system of one linear and one nonlinear equation; (PSAT/NMSQT and PSAT 10 only) solve polynomial equations using factoring.",
+            5: "Within a context, interpret the meaning of a constant or a variable in an exponential or quadratic equation; Make connections between a graph of a nonlinear function and its equation, and identify key features of the graph; (SAT, PSAT/NMSQT, and PSAT 10 only) add, subtract, and multiply polynomials.",
+            6: "(SAT, PSAT/NMSQT, and PSAT 10 only) Within a context, create a quadratic or exponential equation that represents the situation, and solve for an unknown value; (SAT, PSAT/NMSQT, and PSAT 10 only) Within a context, interpret a key feature of the graph of an exponential or quadratic equation representing the situation; Make connections between either the graph of a quadratic or exponential function or points on the graph of a function and its algebraic representation, and (SAT, PSAT/NMSQT, and PSAT 10 only) understand how a translation of a function affects the graph or the equation.",
+            7: "Solve problems with or without context involving one or more nonlinear equations to find the value of an unknown constant; Solve a complex equation or formula for a variable of interest; (SAT only) use properties of exponents and properties of polynomial, rational, and radical expressions to rewrite complex expressions, using structure when present, or determine the most suitable form of an equation to display a certain feature."
+        },
+        "Problem-Solving And Data Analysis": {
+            1: "Solve simple problems using percents or unit rates; Find the median of a list of values presented in ascending order.",
+            2: "Solve problems using percentages, unit rates, and unit conversions; Read, compare, and interpret data presented in a bar graph or frequency table.",
+            3: "Solve problems involving percent, including finding percentages and solving problems in which the percentage is greater than 100; Read and interpret data displayed in a two-way table; calculate the probability of an event from a frequency table or a two-way table.",
+            4: "Identify, interpret, and use ratios, proportions, percentages, and rates, expressing them in equivalent forms, to solve problems; With or without a context, compare and contrast data sets using mean, median, and (SAT, PSAT/NMSQT, and PSAT 10 only) standard deviation; Fit a linear model to data displayed in a scatterplot; (SAT only) Select plausible values of the population mean or population proportion when given a sample mean or sample proportion, respectively, and the associated margin of error.",
+            5: "With or without a context, solve problems using growth factor expressed as a percent or complex unit; Apply the understanding that the probability of all possible outcomes of an event has a sum of 1.",
+            6: "Solve multistep problems using ratios, rates, percentages, and derived units, including problems that arise from products and quotients; Determine the a verage rate of change for data displayed in a graph; determine the mean and median of a data set presented in a frequency table; Calculate the conditional probability of an event from a two-way table.",
+            7: "(SAT only) Identify or describe the population to which the results of a research study can be extended; Determine how the mean, median, and range of a data set are affected by changes in the data set."
+        },
+        "Geometry And Trigonometry": {
+            1: "Find the volume of a right rectangular prism when given the lengths of the edges and the formula for the volume; Find the area of a rectangle when given the lengths of the sides.",
+            2: "Solve problems involving the perimeter and side lengths of plane figures; (SAT, PSAT/NMSQT, and PSAT 10 only) Solve problems by applying theorems related to parallel lines cut by a transversal.",
+            3: "Solve problems involving the area and side lengths of plane figures; Find the measure of an angle by applying definitions and theorems about angles, such as the triangle angle sum theorem and (SAT, PSAT/NMSQT, and PSAT 10 only) theorems related to angles formed by intersecting lines; Use the Pythagorean theorem to find the length of a hypotenuse in a right triangle when given the lengths of the two legs.",
+            4: "Solve problems involving the area of a plane figure or the volume of a cube or pyramid; Solve problems using concepts and theorems related to scale factors, the sum of angles of triangles, and (SAT, PSAT/NMSQT, and PSAT 10 only) congruence and similarity; Find a side length in a given triangle by applying the Pythagorean theorem; (PSAT/NMSQT and PSAT 10 only) find an angle measure in or a side length of a given triangle using the properties of special right triangles.",
+            5: "(SAT only) Solve problems using the relationship between sine and cosine of complementary angles; (SAT only) convert between degree measure and radian measure; (SAT only) Write an equation of a circle in the xy-plane when given the center of the circle and a point that lies on the circle; Solve multistep problems involving area and perimeter of plane figures.",
+            6: "Calculate the surface area, the volume, or a dimension of a prism when given other information about the prism; Solve complex problems by applying the Pythagorean theorem to find a side length of a rectangle or by applying the triangle angle sum theorem; (SAT, PSAT/NMSQT, and PSAT 10 only) Solve complex problems by using concepts and theorems related to congruence and similarity of right triangles, including, but not limited to, trigonometric ratios of right triangles, or by identifying the impact of changes by a scale factor on perimeter, area, and volume.",
+            7: "Solve for missing values in objects modeled by various 2D and 3D geometric shapes by applying formulas for area, surface area, or volume; (SAT, PSAT/NMSQT, and PSAT 10 only) Solve complex problems by applying properties of similar and congruent triangles, theorems related to angles and triangles, or right triangle trigonometry, or (SAT only) use similarity to calculate values of trigonometric ratios; (SAT only) Solve problems using properties and theorems related to circles and parts of circles, such as radii, diameters, tangents, angles, arcs, arc length, and sectors."
+        }
+    }
+}
+
+# --- 2. MODEL SETTINGS AND SHARED LLM CHAINS ---
+
+# Model settings. These are part of the cache keys, so changing them
+# (or editing a prompt and bumping PROMPT_VERSION) never serves stale questions.
+MODEL_NAME = "gemini-2.5-flash-lite"
+TEMPERATURE = 0.7
+PROMPT_VERSION = 2
+
+# Generation runs in two stages. The leveled text only depends on the passage
+# and the score band, so it is cached on its own and reused for every domain
+# and for "regenerate question only" requests.
+LEVEL_PROMPT_TEMPLATE = """
+    You are an expert SAT tutor and content creator.
+    Rewrite the user-provided text below to match a specific SAT score band's complexity.
+
+    - Rewrite it so its vocabulary, sentence structure, and complexity are appropriate for a student in **Score Band {score_band}**.
+    - For lower score bands (1-3), use simpler language and shorter sentences.
+    - For higher score bands (6-7), use more sophisticated vocabulary and more complex sentence structures.
+    - Reply with ONLY the rewritten text. Do not add a heading or any commentary.
+
+    **Original Text:**
+    ---
+    {text}
+    ---
+    """
+
+QUESTION_PROMPT_TEMPLATE = """
+    You are an expert SAT tutor and content creator.
+    Use the Leveled Text below to create one high-quality, multiple-choice question for a student in **Score Band {score_band}**.
+
+    - Use ONLY the Leveled Text to write the question.
+    - The question must specifically assess this skill: **"{skill}"**
+    - The question should be appropriate for the **{subtest}** section's **{domain}** domain.
+    - Present the result under the headings "Question:", "Choices:", and "Feedback:".
+    - The feedback must explain the correct answer and why the others are wrong, referencing the Leveled Text.
+
+    **Leveled Text:**
+    ---
+    {leveled_text}
+    ---
+    """
+
+STAGE_PROMPTS = {
+    "level": (LEVEL_PROMPT_TEMPLATE, ["text", "score_band"]),
+    "question": (QUESTION_PROMPT_TEMPLATE, ["leveled_text", "subtest", "domain", "score_band", "skill"]),
+}
+
+# Streamlit re-runs app.py on every widget change, but this module is only
+# imported once per process. Keeping the chains here means every session
+# reuses the same client instead of building a new one per request.
+_llms = {}
+_chains = {}
+_chains_lock = threading.Lock()
+_llm_override = None
+
+
+def set_llm(llm):
+    """
+    Replaces the Gemini client with another LangChain chat model for every
+    stage, e.g. the fake model in benchmark.py. Pass None to go back to Gemini.
+    """
+    global _llm_override
+    with _chains_lock:
+        _llm_override = llm
+        _llms.clear()
+        _chains.clear()
+
+
+def get_chain(model_name, temperature, stage):
+    """
+    Returns the shared LLMChain for a stage ("level" or "question"), building it on first use.
+    Both stages share one LLM client per model and temperature.
+    The LangChain imports live in here so that loading the page stays fast;
+    they are only paid for when the first question is generated.
+    """
+    key = (model_name, temperature, stage)
+    with _chains_lock:
+        chain = _chains.get(key)
+        if chain is None:
+            from langchain.prompts import PromptTemplate
+            from langchain.chains import LLMChain
+
+            llm = _llm_override or _llms.get((model_name, temperature))
+            if llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                llm = ChatGoogleGenerativeAI(model=model_name, temperature=temperature)
+                _llms[(model_name, temperature)] = llm
+            template, input_variables = STAGE_PROMPTS[stage]
+            prompt = PromptTemplate(input_variables=input_variables, template=template)
+            chain = LLMChain(llm=llm, prompt=prompt)
+            _chains[key] = chain
+        return chain
+
+
+# --- 3. RUNNING ONE STAGE ---
+# Each stage checks the cache, calls its chain on a miss and saves the result.
+
+def level_cache_key(inputs):
+    return make_cache_key(
+        stage="level",
+        text=normalize_passage(inputs["text"]),
+        score_band=inputs["score_band"],
+        model=MODEL_NAME,
+        temperature=TEMPERATURE,
+        prompt_version=PROMPT_VERSION,
+    )
+
+
+def question_cache_key(inputs):
+    return make_cache_key(
+        stage="question",
+        leveled_text=inputs["leveled_text"],
+        subtest=inputs["subtest"],
+        domain=inputs["domain"],
+        score_band=inputs["score_band"],
+        skill=inputs["skill"],
+        model=MODEL_NAME,
+        temperature=TEMPERATURE,
+        prompt_version=PROMPT_VERSION,
+    )
+
+
+def _stage_inputs(stage, inputs):
+    return {name: inputs[name] for name in STAGE_PROMPTS[stage][1]}
+
+
+def _cached_output(stage, cache_key, force_fresh, metrics):
+    # Returns the cached output for a stage (or None) and notes the cache status.
+    if force_fresh:
+        metrics.cache[stage] = "fresh"
+        return None
+    cached_output = get_question_cache().get(cache_key)
+    metrics.cache[stage] = "miss" if cached_output is None else "hit"
+    return cached_output
+
+
+def run_stage(stage, cache_key, inputs, force_fresh=False, metrics=None):
+    metrics = metrics or RequestMetrics()
+    cached_output = _cached_output(stage, cache_key, force_fresh, metrics)
+    if cached_output is not None:
+        return cached_output
+
+    chain = get_chain(MODEL_NAME, TEMPERATURE, stage)
+    stage_inputs = _stage_inputs(stage, inputs)
+    with metrics.stage(stage):
+        output = chain.run(stage_inputs).strip()
+    metrics.add_tokens(chain.prompt.format(**stage_inputs), output)
+    get_question_cache().set(cache_key, output)
+    return output
+
+
+# Async stage calls in flight, keyed by cache key. Bulk jobs for the same
+# passage and band (one per domain) all need the same leveled text, so
+# they wait for one shared call instead of each making their own.
+_running_stages = {}
+
+
+async def _acall_stage(stage, cache_key, inputs, force_fresh, limiter):
+    chain = get_chain(MODEL_NAME, TEMPERATURE, stage)
+    if limiter is None:
+        output = await chain.arun(_stage_inputs(stage, inputs))
+    else:
+        async with limiter():
+            # Waiting for the limiter can take a while; another job may have filled the cache meanwhile
+            cached_output = None if force_fresh else get_question_cache().get(cache_key)
+            if cached_output is not None:
+                return cached_output
+            output = await chain.arun(_stage_inputs(stage, inputs))
+    output = output.strip()
+    get_question_cache().set(cache_key, output)
+    return output
+
+
+async def arun_stage(stage, cache_key, inputs, force_fresh=False, limiter=None):
+    if not force_fresh:
+        cached_output = get_question_cache().get(cache_key)
+        if cached_output is not None:
+            return cached_output
+
+    task = _running_stages.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_acall_stage(stage, cache_key, inputs, force_fresh, limiter))
+        _running_stages[cache_key] = task
+        task.add_done_callback(lambda _: _running_stages.pop(cache_key, None))
+    # Shielded so that one cancelled job does not cancel the call for the others
+    return await asyncio.shield(task)
+
+
+def stream_stage(stage, cache_key, inputs, force_fresh=False, metrics=None):
+    """
+    Yields a stage's output as it is generated and returns the full text
+    (use `output = yield from stream_stage(...)`).
+    """
+    metrics = metrics or RequestMetrics()
+    cached_output = _cached_output(stage, cache_key, force_fresh, metrics)
+    if cached_output is not None:
+        metrics.mark_first_token()
+        yield cached_output
+        return cached_output
+
+    # LLMChain.stream only yields the finished text, so stream from the
+    # chain's own model and prompt to get tokens as they arrive.
+    chain = get_chain(MODEL_NAME, TEMPERATURE, stage)
+    prompt_text = chain.prompt.format(**_stage_inputs(stage, inputs))
+    pieces = []
+    usage = {}
+    with metrics.stage(stage):
+        for chunk in chain.llm.stream(prompt_text):
+            # Streamed usage data is split across chunks and adds up
+            for name, count in (getattr(chunk, "usage_metadata", None) or {}).items():
+                if isinstance(count, int):
+                    usage[name] = usage.get(name, 0) + count
+            if chunk.content:
+                metrics.mark_first_token()
+                pieces.append(chunk.content)
+                yield chunk.content
+
+    output = "".join(pieces).strip()
+    metrics.add_tokens(prompt_text, output, usage)
+    get_question_cache().set(cache_key, output)
+    return output
+
+
+# --- 4. THE AI GENERATOR FUNCTION ---
+def prepare_request(original_text, subtest, domain, score_band):
+    """
+    Looks up the target skill and builds the prompt inputs for a request.
+    Long passages are first condensed to the score band's token budget.
+    Raises KeyError if the subtest, domain, or score band is not in the database.
+    """
+    target_skill = SKILLS_DATABASE[subtest][domain][score_band]
+    passage, _, _ = condense_passage(original_text, score_band)
+    return {
+        "text": passage,
+        "subtest": subtest,
+        "domain": domain,
+        "score_band": score_band,
+        "skill": target_skill,
+    }
+
+
+def request_key(original_text, subtest, domain, score_band, force_fresh=False, fresh_question=False):
+    """
+    Returns a key that is the same for identical generation requests,
+    so the job scheduler can merge them into one LLM call.
+    """
+    return make_cache_key(
+        stage="request",
+        text=normalize_passage(original_text),
+        subtest=subtest,
+        domain=domain,
+        score_band=score_band,
+        force_fresh=force_fresh,
+        fresh_question=fresh_question,
+    )
+
+
+# (This is the same function you perfected earlier)
+def generate_sat_question(original_text, subtest, domain, score_band, force_fresh=False, fresh_question=False,
+                          metrics=None):
+    """
+    Generates a leveled SAT question using a Large Language Model.
+    The LLM first levels the text, then writes the question from the leveled text.
+    Both stages are cached: pass force_fresh=True to redo both, or
+    fresh_question=True to keep the leveled text and only write a new question.
+    Pass a RequestMetrics (see metrics.py) to record timings, tokens and cache status.
+    """
+    metrics = metrics or RequestMetrics()
+
+    # 1. Get the target skill from the database
+    try:
+        with metrics.stage("prompt"):
+            inputs = prepare_request(original_text, subtest, domain, score_band)
+    except KeyError:
+        return "Error: The selected subtest, domain, or score band is not in the database."
+
+    # 2. Level the text (shared by every domain at this score band)
+    inputs["leveled_text"] = run_stage("level", level_cache_key(inputs), inputs, force_fresh, metrics)
+
+    # 3. Write the question from the leveled text
+    question = run_stage("question", question_cache_key(inputs), inputs, force_fresh or fresh_question, metrics)
+
+    metrics.finish()
+    return f"**Leveled Text:**\n{inputs['leveled_text']}\n\n{question}"
+
+
+def stream_sat_question(original_text, subtest, domain, score_band, force_fresh=False, fresh_question=False,
+                        metrics=None):
+    """
+    Streaming version of generate_sat_question: yields the response piece by piece
+    as the LLM writes it, starting with the leveled text. Each stage is cached
+    once it finishes, just like a normal call.
+    """
+    metrics = metrics or RequestMetrics()
+    try:
+        with metrics.stage("prompt"):
+            inputs = prepare_request(original_text, subtest, domain, score_band)
+    except KeyError:
+        yield "Error: The selected subtest, domain, or score band is not in the database."
+        return
+
+    yield "**Leveled Text:**\n"
+    inputs["leveled_text"] = yield from stream_stage(
+        "level", level_cache_key(inputs), inputs, force_fresh, metrics
+    )
+    yield "\n\n"
+    yield from stream_stage("question", question_cache_key(inputs), inputs, force_fresh or fresh_question, metrics)
+    metrics.finish()
+
+
+async def agenerate_sat_question(original_text, subtest, domain, score_band, force_fresh=False, fresh_question=False,
+                                 limiter=None):
+    """
+    Async version of generate_sat_question, used by the bulk generator (bulk_generate.py).
+    Shares the same prompts, chains, cache and force_fresh / fresh_question options.
+    Raises KeyError for unknown inputs.
+    `limiter`, if given, returns an async context manager that wraps each LLM call
+    (there are two per question), e.g. for rate and concurrency limits.
+    """
+    inputs = prepare_request(original_text, subtest, domain, score_band)
+    inputs["leveled_text"] = await arun_stage("level", level_cache_key(inputs), inputs, force_fresh, limiter)
+    question = await arun_stage("question", question_cache_key(inputs), inputs, force_fresh or fresh_question, limiter)
+    return f"**Leveled Text:**\n{inputs['leveled_text']}\n\n{question}"
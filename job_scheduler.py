@@ -0,0 +1,264 @@
+# job_scheduler.py - Shared background workers for question generation
+
+import threading
+import time
+from collections import deque
+
+# --- 1. SCHEDULER SETTINGS ---
+
+DEFAULT_MAX_WORKERS = 4   # LLM requests running at the same time
+DEFAULT_MAX_QUEUE = 32    # Requests allowed to wait before new ones are turned away
+
+
+class QueueFullError(Exception):
+    """
+    Raised by JobScheduler.submit when too many requests are already waiting.
+    """
+
+
+# --- 2. JOBS ---
+
+class Job:
+    """
+    One generation request. `func` must return an iterable of text pieces
+    (like stream_sat_question); `partial` holds the text received so far,
+    so a page can show it while it polls for the finished result.
+    """
+
+    def __init__(self, key, user_id, func, args, kwargs, priority="normal"):
+        self.key = key
+        self.user_id = user_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority  # "normal", or "low" for background work such as prefetching
+        self.status = "queued"  # queued -> running -> done / failed / cancelled
+        self.cancel_requested = False
+        self.partial = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self._finished = threading.Event()
+
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the job has finished (or the timeout runs out). Returns done().
+        """
+        return self._finished.wait(timeout)
+
+
+# --- 3. THE SCHEDULER ---
+
+class JobScheduler:
+    """
+    Runs jobs on a fixed pool of worker threads.
+
+    - Identical requests that are already queued or running share one job
+      ("singleflight"), so a class pasting the same passage makes one LLM call.
+    - Each user has their own queue and workers take turns between users,
+      so one user submitting many requests cannot starve the others.
+    - When max_queue requests are waiting, submit raises QueueFullError.
+    - Low-priority jobs wait in their own queue and only run when no
+      normal job is waiting. At most max_low_running of them run at once
+      (by default all workers but one), so background work never fills the
+      whole pool. A normal request for the same key promotes them.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_queue=DEFAULT_MAX_QUEUE, max_low_running=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        if max_low_running is None:
+            max_low_running = max(1, max_workers - 1)
+        self.max_low_running = max_low_running
+        self._condition = threading.Condition()
+        self._queues = {}             # user_id -> deque of waiting jobs
+        self._user_turns = deque()    # users with waiting jobs, in serving order
+        self._low_queue = deque()     # waiting low-priority jobs
+        self._running_low = set()     # low-priority jobs holding a worker
+        self._in_flight = {}          # key -> queued or running job
+        self._queued_count = 0
+        self._workers = []
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def submit(self, key, user_id, func, *args, priority="normal", **kwargs):
+        """
+        Queues func(*args, **kwargs) and returns its Job without waiting for it.
+        If an identical request (same key) is already in flight, returns that job instead.
+        """
+        with self._condition:
+            job = self._in_flight.get(key)
+            if job is not None:
+                self.coalesced += 1
+                if priority == "normal" and job.priority == "low":
+                    # Someone is now waiting on this job, so it jumps out of the background queue
+                    job.priority = "normal"
+                    if job.status == "queued":
+                        self._low_queue.remove(job)
+                        self._enqueue(job)
+                        self._condition.notify()
+                    elif job in self._running_low:
+                        # It is real work now, so it frees up a background slot
+                        self._running_low.discard(job)
+                        self._condition.notify()
+                return job
+
+            waiting = self._queued_count if priority == "normal" else len(self._low_queue)
+            if waiting >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError("Too many questions are being generated right now. Please try again shortly.")
+
+            job = Job(key, user_id, func, args, kwargs, priority)
+            self._in_flight[key] = job
+            if priority == "normal":
+                self._enqueue(job)
+            else:
+                self._low_queue.append(job)
+            self.submitted += 1
+            self._start_workers()
+            self._condition.notify()
+            return job
+
+    def cancel(self, job):
+        """
+        Cancels a job. A queued job is dropped right away; a running job stops
+        at its next text piece (so nothing half-finished gets cached).
+        Either way the job stops accepting new requests, so a later identical
+        request starts a fresh job instead of joining this one.
+        """
+        with self._condition:
+            if job.done():
+                return
+            job.cancel_requested = True
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            if job.status != "queued":
+                return
+            if job.priority == "low":
+                self._low_queue.remove(job)
+            else:
+                queue = self._queues[job.user_id]
+                queue.remove(job)
+                self._queued_count -= 1
+                if not queue:
+                    del self._queues[job.user_id]
+                    self._user_turns.remove(job.user_id)
+            self._finish(job, "cancelled")
+
+    def _enqueue(self, job):
+        # Callers must already hold self._condition.
+        if job.user_id not in self._queues:
+            self._queues[job.user_id] = deque()
+            self._user_turns.append(job.user_id)
+        self._queues[job.user_id].append(job)
+        self._queued_count += 1
+
+    def _finish(self, job, status):
+        # Callers must already hold self._condition.
+        job.status = status
+        if status == "cancelled":
+            self.cancelled += 1
+        if self._in_flight.get(job.key) is job:
+            del self._in_flight[job.key]
+        if job in self._running_low:
+            self._running_low.discard(job)
+            # A background slot is free again, so wake a worker that may be waiting for one
+            self._condition.notify()
+        job._finished.set()
+
+    def queue_position(self, job):
+        """
+        Returns roughly how many jobs will run before this one (0 once it is running).
+        """
+        with self._condition:
+            if job.status != "queued":
+                return 0
+            return sum(1 for queue in self._queues.values() for waiting in queue if waiting.submitted_at < job.submitted_at)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queued": self._queued_count,
+                "queued_low": len(self._low_queue),
+                "running_low": len(self._running_low),
+                "in_flight": len(self._in_flight),
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+            }
+
+    def _start_workers(self):
+        # Callers must already hold self._condition.
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"question-worker-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        # Round-robin between users: take one job from the next user in line,
+        # and send them to the back if they still have jobs waiting.
+        # Low-priority jobs only run when no user is waiting and a background slot is free.
+        with self._condition:
+            while not self._user_turns and not (self._low_queue and len(self._running_low) < self.max_low_running):
+                self._condition.wait()
+            if not self._user_turns:
+                job = self._low_queue.popleft()
+                self._running_low.add(job)
+            else:
+                user_id = self._user_turns.popleft()
+                queue = self._queues[user_id]
+                job = queue.popleft()
+                if queue:
+                    self._user_turns.append(user_id)
+                else:
+                    del self._queues[user_id]
+                self._queued_count -= 1
+            job.status = "running"
+            return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            status = "done"
+            pieces = None
+            try:
+                pieces = job.func(*job.args, **job.kwargs)
+                for piece in pieces:
+                    if job.cancel_requested:
+                        status = "cancelled"
+                        break
+                    job.partial += piece
+                else:
+                    job.result = job.partial
+            except Exception as error:
+                job.error = error
+                status = "failed"
+            finally:
+                if hasattr(pieces, "close"):
+                    pieces.close()
+                with self._condition:
+                    self._finish(job, status)
+
+
+# --- 4. SHARED INSTANCE ---
+
+# One scheduler per process, shared by every Streamlit session.
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler():
+    """
+    Returns the process-wide JobScheduler, creating it on first use.
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = JobScheduler()
+        return _shared_scheduler
@@ -0,0 +1,121 @@
+# metrics.py - Per-request latency and token instrumentation
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from passage_condenser import estimate_tokens
+
+# --- 1. METRICS LOG ---
+
+# One JSON record per request is appended here (and kept in memory for the debug panel).
+METRICS_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".metrics.jsonl")
+RECENT_LIMIT = 50
+
+_recent = deque(maxlen=RECENT_LIMIT)
+_log_lock = threading.Lock()
+
+
+def log_metrics(metrics, path=METRICS_LOG_PATH):
+    """
+    Appends a finished request's record to the metrics log (once per request,
+    even when several sessions share the request). Pass path=None to keep it in memory only.
+    """
+    with _log_lock:
+        if metrics.logged:
+            return
+        metrics.logged = True
+        metrics.finish()
+        record = metrics.to_dict()
+        _recent.append(record)
+        if path is not None:
+            with open(path, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(record) + "\n")
+
+
+def recent_metrics():
+    """
+    Returns the most recent records, newest first.
+    """
+    with _log_lock:
+        return list(reversed(_recent))
+
+
+# --- 2. ONE REQUEST'S MEASUREMENTS ---
+
+class RequestMetrics:
+    """
+    Collects timings (in seconds), token counts and cache status for one request.
+
+    - stages: time spent per stage, e.g. "prompt", "level", "question", "render"
+    - time_to_first_token: from the start of the request to the first streamed text
+    - prompt_tokens / completion_tokens: from the model's usage data when it
+      reports any, otherwise estimated from the text (tokens_estimated is True)
+    - cache: "hit", "miss" or "fresh" for each LLM stage
+    """
+
+    def __init__(self, **labels):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.labels = labels
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.cache = {}
+        self.time_to_first_token = None
+        self.total = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.logged = False
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a block of code and adds it to the named stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def mark_first_token(self):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self._start
+
+    def add_tokens(self, prompt_text, completion_text, usage=None):
+        """
+        Adds an LLM call's token counts, using the model's usage data if there is any.
+        """
+        if usage:
+            self.prompt_tokens += usage.get("input_tokens", 0)
+            self.completion_tokens += usage.get("output_tokens", 0)
+        else:
+            self.prompt_tokens += estimate_tokens(prompt_text)
+            self.completion_tokens += estimate_tokens(completion_text)
+            self.tokens_estimated = True
+
+    def finish(self):
+        """
+        Records the total time (only the first call counts).
+        """
+        if self.total is None:
+            self.total = time.perf_counter() - self._start
+
+    def to_dict(self):
+        return {
+            "request_id": self.request_id,
+            "started_at": self.started_at,
+            **self.labels,
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "time_to_first_token": None if self.time_to_first_token is None else round(self.time_to_first_token, 4),
+            "total": None if self.total is None else round(self.total, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "cache": dict(self.cache),
+        }
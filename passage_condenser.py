@@ -0,0 +1,125 @@
+# passage_condenser.py - Shortens long pasted passages before they reach the LLM
+
+import math
+import re
+from collections import Counter
+
+# --- 1. TOKEN BUDGETS ---
+
+# The most passage tokens sent to the leveling prompt for each score band.
+# SAT passages are short, and lower bands are rewritten into even shorter
+# texts, so a long article only needs its most relevant part.
+BAND_TOKEN_BUDGETS = {
+    1: 300,
+    2: 350,
+    3: 400,
+    4: 500,
+    5: 600,
+    6: 700,
+    7: 800,
+}
+
+# Chunks are kept well below the smallest budget so several can be chosen.
+MAX_CHUNK_TOKENS = 120
+
+# Common words that say nothing about what a passage is about
+STOPWORDS = set("""
+a an and are as at be but by for from had has have he her his i in is it its of on or
+that the their them they this to was were which who will with you your we our not
+""".split())
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])[\"”’)]*\s+")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of LLM tokens in a text (about 4 characters per token).
+    """
+    return math.ceil(len(text) / 4)
+
+
+# --- 2. SPLITTING INTO CHUNKS ---
+
+def split_into_chunks(text, max_chunk_tokens=MAX_CHUNK_TOKENS):
+    """
+    Yields chunks of the passage, one at a time. Chunks follow paragraph
+    boundaries; a paragraph that is too long is split between sentences.
+    """
+    paragraphs = re.split(r"\n\s*\n", text.replace("\r\n", "\n"))
+    for paragraph in paragraphs:
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_chunk_tokens:
+            yield paragraph
+            continue
+
+        chunk = ""
+        for sentence in SENTENCE_PATTERN.split(paragraph):
+            candidate = f"{chunk} {sentence}".strip()
+            if chunk and estimate_tokens(candidate) > max_chunk_tokens:
+                yield chunk
+                chunk = sentence
+            else:
+                chunk = candidate
+        if chunk:
+            yield chunk
+
+
+# --- 3. SCORING AND SELECTING CHUNKS ---
+
+def _content_words(text):
+    return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def score_chunks(chunks):
+    """
+    Scores each chunk by how much it talks about the passage's main topics
+    (words that appear often across the whole passage). The opening chunk
+    gets a bonus because it usually introduces the topic.
+    """
+    chunk_words = [_content_words(chunk) for chunk in chunks]
+    frequencies = Counter(word for words in chunk_words for word in words)
+    scores = []
+    for position, words in enumerate(chunk_words):
+        if not words:
+            scores.append(0.0)
+            continue
+        score = sum(frequencies[word] for word in words) / math.sqrt(len(words))
+        if position == 0:
+            score *= 1.5
+        scores.append(score)
+    return scores
+
+
+def condense_passage(text, score_band, budgets=None):
+    """
+    Shortens a passage to the token budget for its score band by keeping the
+    highest-scoring chunks, in their original order. Passages already within
+    budget are returned unchanged.
+    Returns (condensed_text, original_tokens, condensed_tokens).
+    """
+    budget = (budgets or BAND_TOKEN_BUDGETS)[score_band]
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= budget:
+        return text, original_tokens, original_tokens
+
+    chunks = list(split_into_chunks(text))
+    scores = score_chunks(chunks)
+
+    # Take the best chunks that still fit, then put them back in passage order
+    chosen = []
+    used_tokens = 0
+    for index in sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True):
+        chunk_tokens = estimate_tokens(chunks[index])
+        if used_tokens + chunk_tokens <= budget:
+            chosen.append(index)
+            used_tokens += chunk_tokens
+    if chosen:
+        condensed = "\n\n".join(chunks[index] for index in sorted(chosen))
+    else:
+        # Not even one chunk fits (e.g. one enormous sentence): cut it at a word boundary
+        condensed = " ".join(text.split())[: budget * 4].rsplit(" ", 1)[0]
+
+    return condensed, original_tokens, estimate_tokens(condensed)
@@ -0,0 +1,121 @@
+# prefetch.py - Speculatively generate the questions a user is likely to ask for next
+
+import threading
+
+from generator import SKILLS_DATABASE, request_key, stream_sat_question
+from job_scheduler import QueueFullError
+from metrics import RequestMetrics
+from question_cache import make_cache_key, normalize_passage
+
+# --- 1. PREFETCH SETTINGS ---
+
+# How many background generations one session may start for a passage.
+# The budget starts over when the session pastes a different passage.
+DEFAULT_PREFETCH_BUDGET = 4
+
+# Process-wide counters, used to tune the budget and the neighbor order.
+_stats = {"started": 0, "hits": 0, "cancelled": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def prefetch_stats():
+    """
+    Returns the prefetch counters and the hit rate (hits per prefetch started).
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["hit_rate"] = stats["hits"] / stats["started"] if stats["started"] else 0.0
+    return stats
+
+
+# --- 2. CHOOSING WHAT TO PREFETCH ---
+
+def neighbor_requests(subtest, domain, score_band):
+    """
+    Lists the (domain, score_band) pairs a user usually tries next, most likely first:
+    the bands just above and below, then the other domains of the same subtest.
+    """
+    neighbors = []
+    for band in (score_band + 1, score_band - 1):
+        if band in SKILLS_DATABASE[subtest][domain]:
+            neighbors.append((domain, band))
+    for sibling in SKILLS_DATABASE[subtest]:
+        if sibling != domain:
+            neighbors.append((sibling, score_band))
+    return neighbors
+
+
+def passage_key(original_text):
+    return make_cache_key(text=normalize_passage(original_text))
+
+
+# --- 3. PER-SESSION PREFETCHING ---
+# `state` is a plain dict kept in the session (st.session_state["prefetch"]).
+
+def new_prefetch_state():
+    return {"passage": None, "jobs": {}, "started": 0}
+
+
+def cancel_prefetch(state, scheduler):
+    """
+    Cancels this session's prefetches that have not finished yet and resets its budget.
+    Jobs that a real request has since joined (promoted to normal priority) keep running.
+    """
+    for job in state["jobs"].values():
+        if not job.done() and job.priority == "low":
+            scheduler.cancel(job)
+            _count("cancelled")
+    state["passage"] = None
+    state["jobs"] = {}
+    state["started"] = 0
+
+
+def check_passage(state, scheduler, original_text):
+    """
+    Cancels outstanding prefetches when the session's passage has changed.
+    """
+    if state["passage"] is not None and state["passage"] != passage_key(original_text):
+        cancel_prefetch(state, scheduler)
+
+
+def record_request(state, key):
+    """
+    Call for every real request. Counts a prefetch hit if it was prefetched for this session.
+    """
+    if state["jobs"].pop(key, None) is not None:
+        _count("hits")
+
+
+def start_prefetch(state, scheduler, user_id, original_text, subtest, domain, score_band,
+                   budget=DEFAULT_PREFETCH_BUDGET):
+    """
+    Queues low-priority generations for the neighbors of a finished request,
+    within the session's budget. Their results land in the normal response cache.
+    """
+    check_passage(state, scheduler, original_text)
+    state["passage"] = passage_key(original_text)
+
+    for neighbor_domain, neighbor_band in neighbor_requests(subtest, domain, score_band):
+        if state["started"] >= budget:
+            break
+        key = request_key(original_text, subtest, neighbor_domain, neighbor_band)
+        if key in state["jobs"]:
+            continue
+        try:
+            job = scheduler.submit(
+                key, user_id, stream_sat_question,
+                original_text, subtest, neighbor_domain, neighbor_band,
+                priority="low",
+                metrics=RequestMetrics(subtest=subtest, domain=neighbor_domain, score_band=neighbor_band, prefetch=True),
+            )
+        except QueueFullError:
+            # A full background queue just means no prefetching this time
+            break
+        state["jobs"][key] = job
+        state["started"] += 1
+        _count("started")
@@ -0,0 +1,213 @@
+# question_bank.py - Reading and writing the per-domain question bank files
+
+import os
+import random
+import re
+import threading
+
+# --- 1. BANK FILES ---
+
+BANK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Each SKILLS_DATABASE domain has its own bank file in the repo folder.
+BANK_FILES = {
+    "Information And Ideas": "Information and Ideas.txt",
+    "Craft And Structure": "Craft and Structure.txt",
+    "Expression Of Ideas": "Expression of Ideas.txt",
+    "Standard English Conventions": "Standard English Conventions.txt",
+    "Algebra": "Algebra.txt",
+    "Advanced Math": "Advanced Math.txt",
+    "Problem-Solving And Data Analysis": "Problem Solving and Data Analysis.txt",
+    "Geometry And Trigonometry": "Geometry and Trigonometry.txt",
+}
+
+# Items in a bank file are separated by a line of dashes.
+ITEM_SEPARATOR = "-----------"
+
+SECTION_NAMES = ("Leveled Text", "Question", "Choices", "Feedback")
+
+# Matches a section heading as the LLM (or a person) tends to write it:
+# "Leveled Text:", "**Question**", "**Choices:**", "### Feedback", ...
+# Anything after the heading on the same line is kept as section content.
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:#{1,6}\s*)?\**\s*(leveled text|question|choices|feedback)"
+    r"\s*(?:\**\s*:|:\s*\**|\**\s*$)\s*\**\s*(.*)$",
+    re.IGNORECASE,
+)
+
+_write_lock = threading.Lock()
+
+
+def bank_path(domain, bank_dir=BANK_DIR):
+    """
+    Returns the path of the bank file for a SKILLS_DATABASE domain.
+    Raises KeyError if the domain has no bank file.
+    """
+    return os.path.join(bank_dir, BANK_FILES[domain])
+
+
+# --- 2. PARSING GENERATED OUTPUT ---
+
+def split_sections(text):
+    """
+    Splits a generated response into its Leveled Text, Question, Choices and
+    Feedback sections. Returns a dict with only the sections that were found.
+    """
+    canonical = {name.lower(): name for name in SECTION_NAMES}
+    sections = {}
+    current = None
+    for line in text.replace("\r\n", "\n").split("\n"):
+        match = HEADING_PATTERN.match(line)
+        if match:
+            current = canonical[match.group(1).lower()]
+            sections[current] = [match.group(2)] if match.group(2) else []
+        elif current is not None:
+            sections[current].append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()}
+
+
+# --- 3. WRITING TO A BANK ---
+
+def format_bank_item(response, score_band):
+    """
+    Rewrites a generated response in the bank file layout:
+    the score band, then the **Leveled Text:** / **Question** / **Choices** / **Feedback** blocks.
+    """
+    sections = split_sections(response)
+    return (
+        f"{score_band}\n"
+        f"**Leveled Text:**\n{sections.get('Leveled Text', '')}\n\n"
+        f"**Question**\n{sections.get('Question', '')}\n\n"
+        f"**Choices**\n{sections.get('Choices', '')}\n\n"
+        f"**Feedback**\n{sections.get('Feedback', '')}\n"
+    )
+
+
+def append_to_bank(domain, response, score_band, bank_dir=BANK_DIR):
+    """
+    Appends a generated response to the domain's bank file as a new item.
+    The bank files use Windows line endings, so new items do too.
+    """
+    item = format_bank_item(response, score_band)
+    with _write_lock:
+        with open(bank_path(domain, bank_dir), "a", encoding="utf-8", newline="\r\n") as bank_file:
+            bank_file.write(f"\n{ITEM_SEPARATOR}\n{item}")
+
+
+# --- 4. READING A BANK ---
+
+def parse_bank_file(path):
+    """
+    Parses a bank file into a list of (score_band, sections) pairs.
+    Items start with an optional score band line; items without one take
+    their band from their position, since the templates have one slot per band.
+    Empty template items (no question or no choices) are skipped.
+    """
+    with open(path, encoding="utf-8") as bank_file:
+        lines = bank_file.read().replace("\r\n", "\n").split("\n")
+
+    # Split the file into items on the separator lines
+    raw_items = [[]]
+    for line in lines:
+        if line.strip() == ITEM_SEPARATOR:
+            raw_items.append([])
+        else:
+            raw_items[-1].append(line)
+
+    # The first line of the file is its title (e.g. "Algebra"), not part of an item
+    first_item = raw_items[0]
+    while first_item and not first_item[0].strip():
+        first_item.pop(0)
+    if first_item and not first_item[0].strip().isdigit() and not HEADING_PATTERN.match(first_item[0]):
+        first_item.pop(0)
+
+    items = []
+    for position, item_lines in enumerate(raw_items, start=1):
+        while item_lines and not item_lines[0].strip():
+            item_lines.pop(0)
+        score_band = position
+        if item_lines and item_lines[0].strip().isdigit():
+            score_band = int(item_lines.pop(0).strip())
+        sections = split_sections("\n".join(item_lines))
+        if not sections.get("Question") or not sections.get("Choices"):
+            continue
+        if score_band in range(1, 8):
+            items.append((score_band, sections))
+    return items
+
+
+def format_sections(sections):
+    """
+    Turns parsed sections back into the markdown the app displays.
+    """
+    return "\n\n".join(
+        f"**{name}:**\n{sections[name]}" for name in SECTION_NAMES if sections.get(name)
+    )
+
+
+class QuestionBankStore:
+    """
+    An in-memory index of the bank files, keyed by (domain, score band).
+    Each file is re-parsed only when its modification time changes.
+    """
+
+    def __init__(self, bank_dir=BANK_DIR):
+        self.bank_dir = bank_dir
+        self._file_versions = {}  # domain -> (mtime, size) of the last parse
+        self._index = {}          # (domain, score_band) -> tuple of formatted items
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Re-parses any bank file that changed since the last refresh.
+        """
+        with self._lock:
+            for domain in BANK_FILES:
+                path = bank_path(domain, self.bank_dir)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    version = None
+                else:
+                    version = (stat.st_mtime_ns, stat.st_size)
+                if self._file_versions.get(domain, False) == version:
+                    continue
+
+                by_band = {}
+                if version is not None:
+                    for score_band, sections in parse_bank_file(path):
+                        by_band.setdefault(score_band, []).append(format_sections(sections))
+                for band in range(1, 8):
+                    self._index[(domain, band)] = tuple(by_band.get(band, ()))
+                self._file_versions[domain] = version
+
+    def count(self, domain, score_band):
+        """
+        Returns how many stored questions match a domain and score band.
+        """
+        self.refresh()
+        return len(self._index.get((domain, score_band), ()))
+
+    def sample(self, domain, score_band):
+        """
+        Returns a random stored question for a domain and score band, or None if there is none.
+        """
+        self.refresh()
+        items = self._index.get((domain, score_band), ())
+        return random.choice(items) if items else None
+
+
+# Like the response cache, the store is shared by every session in the process.
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_question_bank():
+    """
+    Returns the process-wide QuestionBankStore, creating it on first use.
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = QuestionBankStore()
+        return _shared_store
@@ -0,0 +1,213 @@
+# question_cache.py - Response cache for the SAT Question Generator
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --- 1. CACHE SETTINGS ---
+
+# The on-disk cache lives next to the app so it survives Streamlit restarts.
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".question_cache.sqlite3")
+DEFAULT_MEMORY_ENTRIES = 256      # How many responses to keep in RAM
+DEFAULT_DISK_ENTRIES = 5000       # How many responses to keep in SQLite
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # Cached responses expire after a week
+
+
+# --- 2. CACHE KEYS ---
+
+def normalize_passage(text):
+    """
+    Normalizes a pasted passage so that trivial differences
+    (extra spaces, blank lines, Windows line endings) hit the same cache entry.
+    """
+    lines = [" ".join(line.split()) for line in text.replace("\r\n", "\n").split("\n")]
+    paragraphs = []
+    current = []
+    for line in lines:
+        if line:
+            current.append(line)
+        elif current:
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return "\n\n".join(paragraphs)
+
+
+def make_cache_key(**parts):
+    """
+    Builds a stable SHA-256 key from everything that affects the LLM output.
+    Pass the values as keyword arguments, e.g. make_cache_key(text=..., model=...).
+    """
+    digest = hashlib.sha256()
+    for name in sorted(parts):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(str(parts[name]).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+# --- 3. THE TWO-TIER CACHE ---
+
+class QuestionCache:
+    """
+    A two-tier cache for generated responses: an in-process LRU in front of
+    an SQLite table on disk. Both tiers evict by size and by age (TTL).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries=DEFAULT_DISK_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (created_at, response)
+        self._touched = {}            # key -> time of a memory hit not yet saved to disk
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # Streamlit serves each session from its own thread, so the
+        # connection is shared and every access goes through self._lock.
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                response, created_at = row
+                if not self._is_expired(created_at, now):
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, created_at, response)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return response
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, response):
+        """
+        Stores a response in both tiers, evicting old entries if needed.
+        Memory hits are saved to last_access first, so the disk tier evicts
+        the least recently used entries, not just the least recently read from disk.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            self._touched.pop(key, None)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            if self._touched:
+                self._db.executemany(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    [(accessed_at, touched_key) for touched_key, accessed_at in self._touched.items()],
+                )
+                self._touched.clear()
+            if self.ttl_seconds is not None:
+                self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
+
+    def _remember(self, key, created_at, response):
+        # Callers must already hold self._lock.
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties both tiers (the hit/miss counters are kept).
+        """
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters as a dictionary for display.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+# --- 4. SHARED INSTANCE ---
+
+# One cache per process, shared by every Streamlit session (see generator.py).
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_question_cache():
+    """
+    Returns the process-wide QuestionCache, creating it on first use.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = QuestionCache()
+        return _shared_cache
+
+
+def set_question_cache(cache):
+    """
+    Replaces the process-wide cache, e.g. with QuestionCache(db_path=":memory:")
+    so benchmarks do not touch the real cache file.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        _shared_cache = cache
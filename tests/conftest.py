@@ -0,0 +1,6 @@
+# conftest.py - Lets the tests import the app's modules from the repo folder
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
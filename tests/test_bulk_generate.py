@@ -0,0 +1,61 @@
+# test_bulk_generate.py - Tests for retrying malformed replies in bulk_generate.py
+
+import bulk_generate
+import generator
+import question_cache
+from question_bank import bank_path, parse_bank_file
+from question_cache import QuestionCache
+
+GOOD_QUESTION = (
+    "**Question**\nWhich choice best states the main idea?\n\n"
+    "**Choices**\nA) One\nB) Two\nC) Three\nD) Four\n\n"
+    "**Feedback**\nA is correct."
+)
+
+
+class ScriptedChain:
+    """
+    Stands in for an LLMChain: answers each stage with the next scripted reply.
+    """
+
+    def __init__(self, replies):
+        self.replies = replies
+
+    async def arun(self, inputs):
+        return self.replies.pop(0)
+
+
+def run_bulk(monkeypatch, tmp_path, question_replies, retries=2):
+    chains = {
+        "level": ScriptedChain(["A leveled passage."] * 5),
+        "question": ScriptedChain(question_replies),
+    }
+    monkeypatch.setattr(generator, "get_chain", lambda model_name, temperature, stage: chains[stage])
+    monkeypatch.setattr(question_cache, "_shared_cache", QuestionCache(db_path=":memory:"))
+    (tmp_path / "passages").mkdir()
+    (tmp_path / "passages" / "mars.txt").write_text("The rover found layered clay.", encoding="utf-8")
+    progress = tmp_path / "progress.jsonl"
+    status = bulk_generate.main([
+        str(tmp_path / "passages"), "--domain", "Algebra", "--bands", "3",
+        "--bank-dir", str(tmp_path), "--progress", str(progress),
+        "--retries", str(retries), "--backoff", "0", "--rate", "1000",
+    ])
+    return status, progress
+
+
+def test_reply_without_headings_is_retried_with_a_new_question(monkeypatch, tmp_path):
+    status, progress = run_bulk(monkeypatch, tmp_path, ["Here is a question about clay.", GOOD_QUESTION])
+
+    assert status == 0
+    items = parse_bank_file(bank_path("Algebra", str(tmp_path)))
+    assert [band for band, _ in items] == [3]
+    assert items[0][1]["Question"] == "Which choice best states the main idea?"
+    assert len(progress.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_reply_that_never_has_headings_is_not_saved(monkeypatch, tmp_path):
+    status, progress = run_bulk(monkeypatch, tmp_path, ["No headings here."] * 2, retries=1)
+
+    assert status == 1
+    assert not (tmp_path / "Algebra.txt").exists()
+    assert not progress.exists()
@@ -0,0 +1,79 @@
+# test_generator.py - Tests for the async generation path used by bulk_generate.py
+
+import asyncio
+import contextlib
+
+import generator
+import question_cache
+from question_cache import QuestionCache
+
+PASSAGE = "The rover drilled into the crater floor and found layered clay."
+
+
+class FakeChain:
+    """
+    Stands in for an LLMChain: records each call and answers after a short pause.
+    """
+
+    def __init__(self, stage, calls):
+        self.stage = stage
+        self.calls = calls
+
+    async def arun(self, inputs):
+        self.calls.append(self.stage)
+        await asyncio.sleep(0.01)
+        return f"{self.stage} output for {inputs.get('domain', 'any domain')}"
+
+
+def use_fake_chains(monkeypatch):
+    calls = []
+    monkeypatch.setattr(generator, "get_chain", lambda model_name, temperature, stage: FakeChain(stage, calls))
+    monkeypatch.setattr(question_cache, "_shared_cache", QuestionCache(db_path=":memory:"))
+    return calls
+
+
+def generate_all_domains(subtest, score_band, limiter=None):
+    async def run():
+        return await asyncio.gather(*(
+            generator.agenerate_sat_question(PASSAGE, subtest, domain, score_band, limiter=limiter)
+            for domain in generator.SKILLS_DATABASE[subtest]
+        ))
+    return asyncio.run(run())
+
+
+def test_concurrent_domains_share_one_leveling_call(monkeypatch):
+    calls = use_fake_chains(monkeypatch)
+    domains = len(generator.SKILLS_DATABASE["Reading And Writing"])
+
+    responses = generate_all_domains("Reading And Writing", 3)
+
+    assert calls.count("level") == 1
+    assert calls.count("question") == domains
+    leveled_texts = {response.split("\n\n")[0] for response in responses}
+    assert len(leveled_texts) == 1
+    assert generator._running_stages == {}
+
+
+def test_limited_calls_share_one_leveling_call(monkeypatch):
+    calls = use_fake_chains(monkeypatch)
+    semaphore = asyncio.Semaphore(1)
+
+    @contextlib.asynccontextmanager
+    async def limiter():
+        async with semaphore:
+            yield
+
+    generate_all_domains("Math", 5, limiter=limiter)
+
+    assert calls.count("level") == 1
+    assert calls.count("question") == len(generator.SKILLS_DATABASE["Math"])
+
+
+def test_cached_stages_make_no_calls(monkeypatch):
+    calls = use_fake_chains(monkeypatch)
+    generate_all_domains("Math", 2)
+    calls.clear()
+
+    generate_all_domains("Math", 2)
+
+    assert calls == []
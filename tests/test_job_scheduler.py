@@ -0,0 +1,128 @@
+# test_job_scheduler.py - Tests for coalescing, priorities and cancellation in JobScheduler
+
+import threading
+
+from job_scheduler import JobScheduler
+
+TIMEOUT = 5
+
+
+def gated(gate, started=None, text="answer"):
+    """
+    A job function that yields one piece, then waits for `gate` before finishing.
+    """
+    def func():
+        if started is not None:
+            started.set()
+        yield text[:1]
+        gate.wait(TIMEOUT)
+        yield text[1:]
+    return func
+
+
+def occupy_all_workers(scheduler, gate):
+    # Fill every worker with a normal job that waits on `gate`
+    jobs = []
+    for index in range(scheduler.max_workers):
+        started = threading.Event()
+        jobs.append(scheduler.submit(f"busy-{index}", "busy", gated(gate, started)))
+        assert started.wait(TIMEOUT)
+    return jobs
+
+
+def test_identical_requests_share_one_job():
+    scheduler = JobScheduler(max_workers=1)
+    gate = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        gate.wait(TIMEOUT)
+        yield "answer"
+
+    first = scheduler.submit("same", "alice", func)
+    second = scheduler.submit("same", "bob", func)
+    gate.set()
+
+    assert second is first
+    assert first.wait(TIMEOUT)
+    assert first.result == "answer"
+    assert calls == [1]
+    assert scheduler.stats()["coalesced"] == 1
+
+
+def test_normal_request_promotes_queued_low_priority_job():
+    scheduler = JobScheduler(max_workers=1)
+    gate = threading.Event()
+    busy = occupy_all_workers(scheduler, gate)
+
+    low = scheduler.submit("prefetch", "alice", gated(gate), priority="low")
+    other_low = scheduler.submit("other", "alice", gated(gate), priority="low")
+    joined = scheduler.submit("prefetch", "bob", gated(gate))
+
+    assert joined is low
+    assert low.priority == "normal"
+    assert scheduler.stats()["queued"] == 1
+    assert scheduler.stats()["queued_low"] == 1
+
+    gate.set()
+    for job in busy + [low, other_low]:
+        assert job.wait(TIMEOUT)
+    assert low.status == "done"
+
+
+def test_low_priority_jobs_leave_a_worker_free():
+    scheduler = JobScheduler(max_workers=2)
+    gate = threading.Event()
+    low_started = threading.Event()
+    low_jobs = [
+        scheduler.submit(f"prefetch-{index}", "alice", gated(gate, low_started), priority="low")
+        for index in range(3)
+    ]
+    assert low_started.wait(TIMEOUT)
+
+    # Only one of the two workers may be taken by background work
+    normal_started = threading.Event()
+    normal = scheduler.submit("real", "bob", gated(gate, normal_started))
+    assert normal_started.wait(TIMEOUT)
+    assert scheduler.stats()["running_low"] == 1
+    assert scheduler.stats()["queued_low"] == 2
+
+    gate.set()
+    for job in low_jobs + [normal]:
+        assert job.wait(TIMEOUT)
+        assert job.status == "done"
+
+
+def test_cancel_queued_job():
+    scheduler = JobScheduler(max_workers=1)
+    gate = threading.Event()
+    busy = occupy_all_workers(scheduler, gate)
+
+    queued = scheduler.submit("later", "alice", gated(gate))
+    scheduler.cancel(queued)
+
+    assert queued.done()
+    assert queued.status == "cancelled"
+    assert scheduler.stats()["queued"] == 0
+    gate.set()
+    assert busy[0].wait(TIMEOUT)
+
+
+def test_cancelled_running_job_is_not_joined():
+    scheduler = JobScheduler(max_workers=2)
+    gate = threading.Event()
+    started = threading.Event()
+    prefetch = scheduler.submit("band-5", "alice", gated(gate, started), priority="low")
+    assert started.wait(TIMEOUT)
+
+    scheduler.cancel(prefetch)
+    fresh = scheduler.submit("band-5", "bob", gated(gate))
+    gate.set()
+
+    assert fresh is not prefetch
+    assert fresh.wait(TIMEOUT) and prefetch.wait(TIMEOUT)
+    assert prefetch.status == "cancelled"
+    assert prefetch.result is None
+    assert fresh.status == "done"
+    assert fresh.result == "answer"
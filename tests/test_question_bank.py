@@ -0,0 +1,97 @@
+# test_question_bank.py - Tests for parsing, writing and indexing the question bank files
+
+import os
+import shutil
+
+from question_bank import QuestionBankStore, append_to_bank, bank_path, parse_bank_file, split_sections
+
+GENERATED = (
+    "**Leveled Text:**\nThe rover found layered clay in the crater.\n\n"
+    "**Question:** Which choice best states the main idea?\n\n"
+    "### Choices\n(A) Clay\n(B) Rocks\n(C) Dust\n(D) Ice\n\n"
+    "Feedback:\nA is correct."
+)
+
+
+def copy_bank(domain, tmp_path):
+    shutil.copy(bank_path(domain), bank_path(domain, str(tmp_path)))
+    return bank_path(domain, str(tmp_path))
+
+
+def test_split_sections_accepts_heading_variants():
+    sections = split_sections(GENERATED)
+
+    assert sections["Leveled Text"] == "The rover found layered clay in the crater."
+    assert sections["Question"] == "Which choice best states the main idea?"
+    assert sections["Choices"] == "(A) Clay\n(B) Rocks\n(C) Dust\n(D) Ice"
+    assert sections["Feedback"] == "A is correct."
+
+
+def test_numbered_items_skip_empty_templates():
+    # Information and Ideas.txt numbers its items; the band 4 item is an empty template
+    items = parse_bank_file(bank_path("Information And Ideas"))
+
+    assert [band for band, _ in items] == [2, 3, 5, 6, 7]
+    assert items[0][1]["Question"].startswith("Which quotation from")
+    assert items[0][1]["Choices"].startswith("(a)")
+
+
+def test_unnumbered_items_take_their_band_from_their_position():
+    # Geometry and Trigonometry.txt has no band lines, one item per band in order
+    items = parse_bank_file(bank_path("Geometry And Trigonometry"))
+
+    assert [band for band, _ in items] == [1, 2, 3, 4]
+    assert items[1][1]["Question"].startswith("What is the area, in square inches")
+
+
+def test_title_line_is_not_part_of_the_first_item(tmp_path):
+    path = tmp_path / "bank.txt"
+    path.write_text(
+        "Algebra\r\n\r\n**Question**\r\nWhat is x?\r\n**Choices**\r\n(A) 1\r\n"
+        "-----------\r\n**Question**\r\nWhat is y?\r\n**Choices**\r\n(A) 2\r\n",
+        encoding="utf-8",
+    )
+
+    items = parse_bank_file(str(path))
+
+    assert [(band, sections["Question"]) for band, sections in items] == [(1, "What is x?"), (2, "What is y?")]
+
+
+def test_appended_item_is_found_after_the_file_changes(tmp_path):
+    copy_bank("Information And Ideas", tmp_path)
+    store = QuestionBankStore(bank_dir=str(tmp_path))
+    assert store.count("Information And Ideas", 4) == 0
+    assert store.count("Information And Ideas", 5) == 1
+
+    append_to_bank("Information And Ideas", GENERATED, 4, bank_dir=str(tmp_path))
+
+    assert store.count("Information And Ideas", 4) == 1
+    assert store.count("Information And Ideas", 5) == 1
+    sample = store.sample("Information And Ideas", 4)
+    assert "**Question:**\nWhich choice best states the main idea?" in sample
+    with open(bank_path("Information And Ideas", str(tmp_path)), "rb") as bank_file:
+        assert bank_file.read().endswith(b"A is correct.\r\n")
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, monkeypatch):
+    copy_bank("Algebra", tmp_path)
+    store = QuestionBankStore(bank_dir=str(tmp_path))
+    store.refresh()
+    parsed = []
+    monkeypatch.setattr("question_bank.parse_bank_file", lambda path: parsed.append(path) or [])
+
+    store.refresh()
+    assert parsed == []
+
+    path = bank_path("Algebra", str(tmp_path))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    store.refresh()
+    assert parsed == [path]
+
+
+def test_missing_bank_files_have_no_questions(tmp_path):
+    store = QuestionBankStore(bank_dir=str(tmp_path))
+
+    assert store.count("Algebra", 3) == 0
+    assert store.sample("Algebra", 3) is None
@@ -0,0 +1,92 @@
+# test_question_cache.py - Tests for eviction and counters in QuestionCache
+
+import question_cache
+from question_cache import QuestionCache, make_cache_key, normalize_passage
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, **settings):
+    clock = FakeClock()
+    monkeypatch.setattr(question_cache.time, "time", clock)
+    return QuestionCache(db_path=":memory:", **settings), clock
+
+
+def disk_keys(cache):
+    return sorted(key for (key,) in cache._db.execute("SELECT key FROM responses"))
+
+
+def test_counters_track_memory_and_disk_hits(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    assert cache.get("a") is None
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    cache._memory.clear()
+    assert cache.get("a") == "answer"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 1, 1)
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["memory_entries"] == 1
+
+
+def test_memory_tier_keeps_the_most_recently_used(monkeypatch):
+    cache, clock = make_cache(monkeypatch, max_memory_entries=2)
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("c", "c")
+
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.get("b") == "b"  # still on disk
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_evicts_by_size_counting_memory_hits(monkeypatch):
+    cache, clock = make_cache(monkeypatch, max_disk_entries=2)
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    assert cache.get("a") == "a"  # a memory hit, so "b" is now the oldest
+    clock.now += 1
+    cache.set("c", "c")
+
+    assert disk_keys(cache) == ["a", "c"]
+
+
+def test_expired_entries_are_dropped_from_both_tiers(monkeypatch):
+    cache, clock = make_cache(monkeypatch, ttl_seconds=60)
+    cache.set("old", "old")
+    clock.now += 61
+
+    assert cache.get("old") is None
+    assert "old" not in cache._memory
+    cache.set("old", "old")
+    clock.now += 61
+    cache.set("new", "new")
+
+    assert disk_keys(cache) == ["new"]
+
+
+def test_clear_empties_both_tiers(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.set("a", "a")
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert disk_keys(cache) == []
+
+
+def test_keys_ignore_whitespace_differences():
+    messy = "  The rover\r\nfound clay.\r\n\r\n\r\nIt  was layered. "
+    assert normalize_passage(messy) == "The rover found clay.\n\nIt was layered."
+    assert make_cache_key(text="x", model="m") == make_cache_key(model="m", text="x")
+    assert make_cache_key(text="x", model="m") != make_cache_key(text="x", model="n")